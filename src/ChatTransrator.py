@@ -23,6 +23,8 @@ Requirements:
   - googletrans==4.0.0-rc1
   - requests
   - obs-websocket-py
+  - gcld3 (任意・オフライン言語検出)
+  - orjson (任意・JSON 高速化)
   - tkinter (標準)
 
 Modified Function Version:1.0.1 
@@ -36,19 +38,37 @@ import json
 import threading
 import time
 import csv
+import queue
+import re
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, font as tkfont
 from datetime import datetime
 import concurrent.futures
+from collections import OrderedDict, deque
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from googleapiclient.discovery import build
-from googletrans import Translator
+from googletrans import Translator, LANGUAGES as GOOGLE_LANGUAGES
 from obswebsocket import obsws, requests as obs_requests
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+try:
+    import gcld3
+    _DETECTOR = gcld3.NNetLanguageIdentifier(min_num_bytes=0, max_num_bytes=1000)
+except ImportError:
+    # gcld3 が無い環境では googletrans の detect を使う
+    _DETECTOR = None
+
 # === 設定ファイル読み込み ===
-with open("config.json", "r", encoding="utf-8") as f:
-    cfg = json.load(f)
+with open("config.json", "rb") as f:
+    cfg = _json_loads(f.read())
 
 YOUTUBE_API_KEY = cfg["youtube_api_key"]
 CHANNEL_ID      = cfg["channel_id"]
@@ -56,6 +76,7 @@ OBS_CONFIG      = cfg.get("obs", {})
 LANG_OPTIONS    = cfg.get("lang_options", {})
 TRANSLATORS     = cfg.get("translators", {})
 LIBRE_URL       = cfg.get("libre_url")
+GOOGLE_URLS     = cfg.get("google_service_urls", ["translate.google.com"])
 COLORS          = cfg.get("colors", {})
 
 # フィルタリング設定
@@ -65,6 +86,86 @@ SKIP_LANGS    = cfg.get("skip_langs", [])
 # 小文字で扱う除外リスト
 SKIP_LANGS_LOWER = [lang.lower() for lang in SKIP_LANGS]
 
+# 重複排除で保持するメッセージIDの上限
+SEEN_MAX = 8192
+
+# 終了時にポーリングスレッドを待つ最大秒数（超えた分の翻訳結果は破棄）
+CLOSE_TIMEOUT = 1.5
+
+# CSV 書き込みスレッドの設定
+CSV_QUEUE_MAX   = 10000
+CSV_BATCH_MAX   = 512
+CSV_FSYNC_EVERY = 10   # fsync する間隔（書き込み回数）
+# オフライン検出結果をこの信頼度未満ならネットワーク検出にフォールバック
+DETECT_MIN_PROB = cfg.get("detect_min_probability", 0.5)
+# gcld3 と googletrans / lang_options で表記の異なる言語コード
+_GCLD3_CODE_MAP = {
+    "zh": "zh-cn",
+    "zh-hant": "zh-tw",
+    "jv": "jw",
+    "fil": "tl",
+}
+
+def _normalize_gcld3(code: str):
+    """gcld3 の言語コードを googletrans 形式に変換（対応が無ければ None）"""
+    code = code.lower()
+    # ローマ字表記 (ja-Latn など) は元の言語として扱う
+    if code.endswith("-latn"):
+        code = code[:-len("-latn")]
+    code = _GCLD3_CODE_MAP.get(code, code)
+    return code if code in GOOGLE_LANGUAGES else None
+
+# 言語検出結果のキャッシュ上限
+LANG_CACHE_SIZE = 4096
+
+# 翻訳キャッシュ設定
+TRANS_CACHE_FILE = cfg.get("translation_cache_file", "translation_cache.json")
+TRANS_CACHE_SIZE = cfg.get("translation_cache_size", 4096)
+
+# === 文字種による簡易言語判定 ===
+_RE_LETTER = re.compile(r"[^\W\d_]")
+_RE_KANA   = re.compile(r"[\u3040-\u30ff\uff66-\uff9f]")
+_RE_HAN    = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff]")
+_RE_HANGUL = re.compile(r"[\u1100-\u11ff\u3130-\u318f\uac00-\ud7af]")
+FAST_LANG_RATIO = 0.6
+
+def _fast_lang(text: str):
+    """文字種の割合だけで判定できる場合に言語コードを返す（判定不能なら None）"""
+    letters = len(_RE_LETTER.findall(text))
+    if not letters:
+        return None
+    # 漢字のみは中国語と区別できないため、かなを含む場合だけ日本語とする
+    kana = len(_RE_KANA.findall(text))
+    if kana and (kana + len(_RE_HAN.findall(text))) / letters > FAST_LANG_RATIO:
+        return "ja"
+    if len(_RE_HANGUL.findall(text)) / letters > FAST_LANG_RATIO:
+        return "ko"
+    # ラテン・キリル・アラビア文字などは複数言語で使われるので検出器に任せる
+    return None
+
+def _csv_quote(field: str) -> str:
+    return '"' + field.replace('"', '""') + '"'
+
+def _fast_row(ts, author, lang, original, translated):
+    """CSV 1行を直接組み立てる（改行を含む場合は None を返し csv.writer に任せる）"""
+    for field in (author, original, translated):
+        if "\n" in field or "\r" in field:
+            return None
+    return (f"{ts},{_csv_quote(author)},{lang},"
+            f"{_csv_quote(original)},{_csv_quote(translated)}\r\n")
+
+# === LibreTranslate 用 HTTP セッション（コネクション再利用） ===
+_SESSION = requests.Session()
+# 翻訳 API は POST のみなので POST も再試行対象にする
+_ADAPTER = HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.2, allowed_methods=None)
+)
+# ローカルの LibreTranslate (http://localhost:5000 など) にも同じ設定を使う
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+
 # === YouTube クライアント ===
 youtube = build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
 
@@ -99,8 +200,10 @@ class ChatTranslatorApp(tk.Tk):
         self.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # 翻訳クライアント & ThreadPool
-        self.trans_google = Translator()
+        self.trans_google = Translator(service_urls=GOOGLE_URLS, timeout=5)
         self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=5)
+        # チャット取得専用（翻訳ワーカーを占有しないよう分離）
+        self.fetch_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
 
         # OBS WebSocket（任意）
         try:
@@ -123,15 +226,55 @@ class ChatTranslatorApp(tk.Tk):
             for name, code in LANG_OPTIONS.items()
             if code in ENABLED_LANGS
         }
+        # チェック状態から言語セットを事前計算（変更時のみ再計算）
+        for var in (*self.chk_vars.values(), *self.skip_vars.values()):
+            var.trace_add("write", self._recompute_lang_sets)
+        self._recompute_lang_sets()
         self.translator_var = tk.StringVar(value=list(TRANSLATORS.values())[0])
+        # ワーカースレッドから Tk 変数を読まないよう値を写しておく
+        self._engine = self.translator_var.get()
+        self.translator_var.trace_add(
+            "write", lambda *_: setattr(self, "_engine", self.translator_var.get())
+        )
         self.is_running = False
         self.next_page_token = None
+        self._stop = threading.Event()
+        self._poll_thread = None
+
+        # 翻訳キャッシュ（(engine, text, target_lang) -> 訳文 の LRU）
+        self._trans_cache = OrderedDict()
+        self._trans_cache_lock = threading.Lock()
+        self._load_trans_cache()
+
+        # 言語検出結果のキャッシュ（ポーリングスレッド専用）
+        self._lang_cache = OrderedDict()
+
+        # 取得済みメッセージID（古いものから破棄）
+        self._seen_q = deque(maxlen=SEEN_MAX)
+        self._seen = set()
+
+        # OBS 更新は専用スレッドで最新テキストのみ送信
+        self._obs_slot = [None]
+        self._obs_cv = threading.Condition()
+        if self.obs:
+            threading.Thread(target=self._obs_worker, daemon=True).start()
 
         # CSV ログ準備
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.csv_file = open(f"chatlog_{ts}.csv", "w", newline="", encoding="utf-8")
+        self.csv_file = open(f"chatlog_{ts}.csv", "w", newline="", encoding="utf-8",
+                             buffering=65536)
         self.csv_writer = csv.writer(self.csv_file)
         self.csv_writer.writerow(["timestamp", "author", "lang", "original", "translated"])
+        self._csv_flushes = 0
+        # ディスク I/O はポーリングと切り離して専用スレッドで行う
+        self._csv_q = queue.Queue(maxsize=CSV_QUEUE_MAX)
+        self._csv_thread = threading.Thread(target=self._csv_drain, daemon=True)
+        self._csv_thread.start()
+
+        # ログ表示キュー（after 呼び出しをまとめる）
+        self._log_pending = []
+        self._log_lock = threading.Lock()
+        self._log_scheduled = False
 
         # GUI 構築
         self.font = tkfont.Font(family="Consolas", size=11)
@@ -167,22 +310,43 @@ class ChatTranslatorApp(tk.Tk):
 
         # ログ表示
         self.txt_log = scrolledtext.ScrolledText(
-            self, width=100, height=25, state="disabled", font=self.font
+            self, width=100, height=25, state="disabled", font=self.font,
+            undo=False, autoseparators=False
         )
         self.txt_log.grid(row=4, column=0, columnspan=2, padx=10, pady=(10,10))
         for tag, color in self.colors.items():
             self.txt_log.tag_configure(tag, foreground=color)
 
     def log(self, msg: str, tag="original"):
-        def _append():
-            self.txt_log.configure(state="normal")
+        # 終了処理中は破棄予定のウィジェットに描画しない
+        if self._stop.is_set():
+            return
+        with self._log_lock:
+            self._log_pending.append((msg, tag))
+            if self._log_scheduled:
+                return
+            self._log_scheduled = True
+        self.after(0, self._flush_log)
+
+    def _flush_log(self):
+        """溜まったログ行をまとめて1回で描画する"""
+        with self._log_lock:
+            pending, self._log_pending = self._log_pending, []
+            self._log_scheduled = False
+        if not pending:
+            return
+        # 最下部を表示中のときだけ自動スクロール（履歴を読んでいる間は動かさない）
+        autoscroll = self.txt_log.yview()[1] > 0.999
+        self.txt_log.configure(state="normal")
+        for msg, tag in pending:
             self.txt_log.insert("end", msg + "\n", tag)
-            self.txt_log.see("end")
-            self.txt_log.configure(state="disabled")
-        self.after(0, _append)
+        self.txt_log.configure(state="disabled")
+        if autoscroll:
+            self.txt_log.yview_moveto(1.0)
 
     def start(self):
-        if self.is_running:
+        # 終了処理中（on_close の update() 中）は再開しない
+        if self.is_running or self._stop.is_set():
             return
         try:
             vid = get_live_video_id(CHANNEL_ID)
@@ -191,93 +355,321 @@ class ChatTranslatorApp(tk.Tk):
             messagebox.showerror("エラー", str(e))
             return
         self.is_running = True
-        threading.Thread(target=self._poll_loop, args=(chat_id,), daemon=True).start()
+        self._poll_thread = threading.Thread(target=self._poll_loop, args=(chat_id,), daemon=True)
+        self._poll_thread.start()
         self.log(f"[INFO] ライブ検出 OK — videoId={vid}", tag="original")
 
-    def _detect_language(self, text: str) -> str:
+    def _detect_language(self, text: str) -> tuple:
+        """(言語コード, 翻訳元として渡してよいか) を返す"""
+        cache = self._lang_cache
+        result = cache.get(text)
+        if result is not None:
+            cache.move_to_end(text)
+            return result
+        result = self._detect_language_uncached(text)
+        cache[text] = result
+        if len(cache) > LANG_CACHE_SIZE:
+            cache.popitem(last=False)
+        return result
+
+    def _detect_language_uncached(self, text: str) -> tuple:
+        if _DETECTOR is not None:
+            res = _DETECTOR.FindLanguage(text=text)
+            lang = _normalize_gcld3(res.language)
+            if lang and res.probability >= DETECT_MIN_PROB:
+                return lang, res.is_reliable
         det = self.trans_google.detect(text)
-        return det.lang.lower()
+        return det.lang.lower(), True
+
+    def _recompute_lang_sets(self, *_):
+        """チェックボックス変更時に翻訳対象・除外言語を作り直す"""
+        self._target_codes = tuple(
+            code for name, code in LANG_OPTIONS.items()
+            if name in self.chk_vars and self.chk_vars[name].get()
+        )
+        # 検出言語ごとの翻訳先（_targets_for で遅延生成）
+        self._targets_by_lang = {}
+        self._skip_set = frozenset(SKIP_LANGS_LOWER).union(
+            code.lower() for name, code in LANG_OPTIONS.items()
+            if name in self.skip_vars and self.skip_vars[name].get()
+        )
+
+    def _targets_for(self, detected: str) -> tuple:
+        """検出言語を除いた翻訳先を返す（チェック変更までキャッシュ）"""
+        cache = self._targets_by_lang
+        targets = cache.get(detected)
+        if targets is None:
+            targets = tuple(code for code in self._target_codes if code.lower() != detected)
+            cache[detected] = targets
+        return targets
+
+    def _mark_seen(self, mid: str):
+        if len(self._seen_q) == self._seen_q.maxlen:
+            self._seen.discard(self._seen_q[0])
+        self._seen_q.append(mid)
+        self._seen.add(mid)
+
+    def _obs_worker(self):
+        while True:
+            with self._obs_cv:
+                while self._obs_slot[0] is None and not self._stop.is_set():
+                    self._obs_cv.wait()
+                if self._stop.is_set():
+                    return
+                text, self._obs_slot[0] = self._obs_slot[0], None
+            try:
+                self.obs.call(obs_requests.SetText("LiveChatOverlay", text))
+            except:
+                pass
+
+    def _fetch_chat(self, chat_id, page_token, not_before=0.0):
+        delay = not_before - time.monotonic()
+        # 終了要求が来たら待機を打ち切る
+        if delay > 0 and self._stop.wait(delay):
+            return None
+        return youtube.liveChatMessages().list(
+            liveChatId=chat_id,
+            part="authorDetails,snippet",
+            pageToken=page_token or ""
+        ).execute()
 
     def _poll_loop(self, chat_id):
-        seen = set()
+        next_fut = self.fetch_executor.submit(self._fetch_chat, chat_id, self.next_page_token)
         while self.is_running:
-            resp = youtube.liveChatMessages().list(
-                liveChatId=chat_id,
-                part="authorDetails,snippet",
-                pageToken=self.next_page_token or ""
-            ).execute()
+            resp = next_fut.result()
+            if resp is None or self._stop.is_set():
+                break
             self.next_page_token = resp.get("nextPageToken")
             interval = float(resp.get("pollingIntervalMillis", 2000)) / 1000
 
+            # 次ページ取得を先行投入（ポーリング間隔は守りつつ翻訳処理と並行させる）
+            next_fut = self.fetch_executor.submit(
+                self._fetch_chat, chat_id, self.next_page_token,
+                time.monotonic() + interval
+            )
+
+            skip_set = self._skip_set
+            # 除外言語も翻訳先も無ければ検出結果を使わないので検出自体を省く
+            need_detect = bool(skip_set or self._target_codes)
+
             for item in resp.get("items", []):
-                if item["id"] in seen:
+                if self._stop.is_set():
+                    return
+                mid = item["id"]
+                if mid in self._seen:
                     continue
-                seen.add(item["id"])
+                self._mark_seen(mid)
 
                 author   = item["authorDetails"]["displayName"]
                 original = item["snippet"]["displayMessage"]
                 ts       = datetime.now().isoformat()
 
                 # 言語検出
-                detected = self._detect_language(original)
+                detected = None
+                src = "auto"
+                if need_detect:
+                    detected = _fast_lang(original)
+                    if detected is None:
+                        detected, reliable = self._detect_language(original)
+                        # 信頼できる検出結果のみ翻訳元として渡す
+                        if reliable:
+                            src = detected
                 # 除外リスト UI と config の両方からチェック
-                ui_skip = [code.lower() for name, code in LANG_OPTIONS.items()
-                           if name in self.skip_vars and self.skip_vars[name].get()]
-                if detected in SKIP_LANGS_LOWER or detected in ui_skip:
+                if detected in skip_set:
                     self.log(f"[SKIP] Detected '{detected}', skipping", tag="original")
-                    self.csv_writer.writerow([ts, author, detected, original, original])
+                    self._csv_q.put([ts, author, detected, original, original])
                     continue
 
                 # 原文ログ
                 self.log(f"▶ {author}: {original}", tag="original")
-                self.csv_writer.writerow([ts, author, "original", original, original])
+                self._csv_q.put([ts, author, "original", original, original])
 
                 # OBS オーバーレイ
                 if self.obs:
-                    try:
-                        self.obs.call(obs_requests.SetText("LiveChatOverlay", f"{author}: {original}"))
-                    except:
-                        pass
-
-                # 翻訳対象言語 filters
-                target_codes = [code for name, code in LANG_OPTIONS.items()
-                                if name in self.chk_vars and self.chk_vars[name].get()]
-                futures = {self.executor.submit(self._translate_free, original, code): code
-                           for code in target_codes}
-                for fut in concurrent.futures.as_completed(futures):
-                    code = futures[fut]
-                    try:
-                        tr = fut.result()
-                    except Exception as e:
-                        tr = f"[Error] {e}"
+                    with self._obs_cv:
+                        self._obs_slot[0] = f"{author}: {original}"
+                        self._obs_cv.notify()
+
+                # 翻訳対象言語 filters（原文と同じ言語は翻訳しない）
+                target_codes = self._targets_for(detected)
+                if not target_codes:
+                    if detected:
+                        self.log(f"   → [{detected}]: {original}", tag=detected)
+                    continue
+                if self._stop.is_set():
+                    return
+                results = self._translate_free_batch(original, target_codes, src=src)
+                for code, tr in results.items():
                     self.log(f"   → [{code}]: {tr}", tag=code)
-                    self.csv_writer.writerow([ts, author, code, original, tr])
-
-            time.sleep(interval)
+                    self._csv_q.put([ts, author, code, original, tr])
 
-    def _translate_free(self, text: str, target_lang: str) -> str:
-        engine = self.translator_var.get()
+    def _load_trans_cache(self):
+        try:
+            with open(TRANS_CACHE_FILE, "rb") as f:
+                entries = _json_loads(f.read())
+        except (OSError, ValueError):
+            return
+        if not isinstance(entries, list):
+            return
+        for entry in entries[-TRANS_CACHE_SIZE:]:
+            # 形式の合わないエントリや空の訳文は読み飛ばす
+            if (not isinstance(entry, list) or len(entry) != 4
+                    or not all(isinstance(v, str) for v in entry) or not entry[3]):
+                continue
+            engine, text, lang, translated = entry
+            self._trans_cache[(engine, text, lang)] = translated
+
+    def _save_trans_cache(self):
+        with self._trans_cache_lock:
+            entries = [[*key, val] for key, val in self._trans_cache.items()]
+        try:
+            with open(TRANS_CACHE_FILE, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+        except OSError:
+            pass
+
+    def _csv_drain(self):
+        """キューに溜まった行をまとめて CSV に書き込む（None で終了）"""
+        while True:
+            rows = [self._csv_q.get()]
+            while len(rows) < CSV_BATCH_MAX:
+                try:
+                    rows.append(self._csv_q.get_nowait())
+                except queue.Empty:
+                    break
+            done = None in rows
+            rows = [row for row in rows if row is not None]
+            if rows:
+                # 書き込みに失敗してもスレッドは止めずにキューを消費し続ける
+                try:
+                    self._write_csv_rows(rows)
+                except Exception as e:
+                    self.log(f"[ERROR] CSV 書き込みに失敗しました: {e}", tag="original")
+            if done:
+                return
+
+    def _write_csv_rows(self, rows):
+        lines = []
+        for row in rows:
+            line = _fast_row(*row)
+            if line is None:
+                self.csv_file.write("".join(lines))
+                lines.clear()
+                self.csv_writer.writerow(row)
+            else:
+                lines.append(line)
+        self.csv_file.write("".join(lines))
+        self.csv_file.flush()
+        self._csv_flushes += 1
+        if self._csv_flushes % CSV_FSYNC_EVERY == 0:
+            os.fsync(self.csv_file.fileno())
+
+    def _translate_free_batch(self, text: str, target_langs, src: str = "auto") -> dict:
+        """1メッセージ分の翻訳をまとめて実行し {言語コード: 訳文} を返す"""
+        engine = self._engine
+        results = {}
+        misses = []
+        # キャッシュ済みはスレッドに投げずその場で返す
+        for code in dict.fromkeys(target_langs):
+            cached = self._cache_get((engine, text, code))
+            if cached is None:
+                misses.append(code)
+            else:
+                results[code] = cached
+
+        if len(misses) == 1:
+            code = misses[0]
+            try:
+                results[code] = self._translate_uncached(engine, text, code, src)
+            except Exception as e:
+                results[code] = f"[Error] {e}"
+        elif misses:
+            futures = {
+                self.executor.submit(self._translate_uncached, engine, text, code, src): code
+                for code in misses
+            }
+            for fut in concurrent.futures.as_completed(futures):
+                code = futures[fut]
+                try:
+                    results[code] = fut.result()
+                except Exception as e:
+                    results[code] = f"[Error] {e}"
+        # 表示順は選択順に揃える
+        return {code: results[code] for code in target_langs if code in results}
+
+    def _cache_get(self, key):
+        with self._trans_cache_lock:
+            if key not in self._trans_cache:
+                return None
+            self._trans_cache.move_to_end(key)
+            return self._trans_cache[key]
+
+    def _translate_uncached(self, engine: str, text: str, target_lang: str, src: str = "auto") -> str:
+        translated = self._do_translate(engine, text, target_lang, src)
+        # 空の結果は失敗扱いとしてキャッシュしない
+        if not translated:
+            return translated
+
+        key = (engine, text, target_lang)
+        with self._trans_cache_lock:
+            self._trans_cache[key] = translated
+            self._trans_cache.move_to_end(key)
+            while len(self._trans_cache) > TRANS_CACHE_SIZE:
+                self._trans_cache.popitem(last=False)
+        return translated
+
+    def _do_translate(self, engine: str, text: str, target_lang: str, src: str = "auto") -> str:
         if engine == "googletrans":
-            return self.trans_google.translate(text, dest=target_lang).text
+            # 検出済みの言語を渡して googletrans 側の自動検出を省く
+            src = src.lower() if src else "auto"
+            if src not in GOOGLE_LANGUAGES:
+                src = "auto"
+            return self.trans_google.translate(text, dest=target_lang, src=src).text
         elif engine == "libre":
-            r = requests.post(LIBRE_URL, data={
+            r = _SESSION.post(LIBRE_URL, json={
                 "q": text,
                 "source": "auto",
                 "target": target_lang,
                 "format": "text"
-            })
-            return r.json().get("translatedText", "")
+            }, timeout=(3, 10))
+            r.raise_for_status()
+            data = _json_loads(r.content)
+            translated = data.get("translatedText")
+            if not translated:
+                raise RuntimeError(data.get("error") or "LibreTranslate returned no translation")
+            return translated
         else:
             raise RuntimeError("Unsupported translator")
 
     def on_close(self):
+        # 終了待ち中の update() から再度呼ばれても二重に閉じない
+        if self._stop.is_set():
+            return
         self.is_running = False
-        time.sleep(0.5)
+        self._stop.set()
+        with self._obs_cv:
+            self._obs_cv.notify_all()
+        # ポーリングスレッドの終了を待つ（待機中もイベントを処理して after 呼び出しを詰まらせない）
+        if self._poll_thread:
+            deadline = time.monotonic() + CLOSE_TIMEOUT
+            while self._poll_thread.is_alive() and time.monotonic() < deadline:
+                self.update()
+                self._poll_thread.join(timeout=0.05)
+        self.fetch_executor.shutdown(wait=False)
         if self.obs:
             try:
                 self.obs.disconnect()
             except:
                 pass
+        self._save_trans_cache()
+        _SESSION.close()
+        # 書き込みスレッドが停止していてもキュー待ちで固まらないようにする
+        if self._csv_thread.is_alive():
+            try:
+                self._csv_q.put(None, timeout=1)
+            except queue.Full:
+                pass
+            self._csv_thread.join(timeout=CLOSE_TIMEOUT)
         self.csv_file.close()
         self.destroy()
 